@@ -0,0 +1,108 @@
+# air_cli.py
+# Unified entry point:  python air_cli.py {convert,batch,inspect,export,verify,serve,synth} [options]
+# Only the stdlib is imported at startup; numpy/scipy/sofar/netCDF4/matplotlib are loaded inside the
+# subcommand that needs them, so `--help` and "nothing to do" runs stay cheap (see bench_startup.py).
+import os, sys, glob, argparse
+
+# ---- subcommands that live in their own scripts --------------------------------
+def _delegate(module):
+    def run(argv, prog):
+        import importlib
+        return importlib.import_module(module).main(argv, prog=prog)
+    return run
+
+# ---- inspect ---------------------------------------------------------------------
+def _inspect(argv, prog):
+    ap = argparse.ArgumentParser(prog=prog, description="print Data.IR stats of SOFA files (headless)")
+    ap.add_argument("paths", nargs="+", help="*.sofa (glob patterns allowed)")
+    ap.add_argument("--plot", action="store_true", help="plot the first --plot_ms of each IR (imports matplotlib)")
+    ap.add_argument("--plot_ms", type=float, default=50.0)
+    args = ap.parse_args(argv)
+
+    paths = _expand(args.paths)
+    if not paths:
+        print(f"[WARN] no .sofa files: {' '.join(args.paths)}")
+        return 1
+    import numpy as np
+    from export_audio import read_ir
+    for p in paths:
+        ir, fs = read_ir(p)
+        M, R, N = ir.shape
+        print(f"{os.path.basename(p)}")
+        print(f"  Data_IR shape = (M,R,N) = {ir.shape}  fs = {fs:g} Hz")
+        print(f"  Peak (per ch)    : {np.abs(ir).max(axis=2).squeeze()}")
+        print(f"  RMS  (per ch)    : {np.sqrt(np.mean(ir**2, axis=2)).squeeze()}")
+        print(f"  Length [samples] : {N}  ({N/fs:.3f} s)")
+        if args.plot:
+            import matplotlib.pyplot as plt
+            n_show = min(N, int(fs * args.plot_ms / 1000))
+            tt = np.arange(n_show) / fs * 1000.0
+            plt.figure()
+            for r, lab in zip(range(R), ["Left", "Right"] + [f"ch{i}" for i in range(2, R)]):
+                plt.plot(tt, ir[0, r, :n_show], label=lab)
+            plt.xlabel("Time [ms]"); plt.ylabel("Amplitude")
+            plt.title(f"{os.path.basename(p)} (first {args.plot_ms:g} ms)")
+            plt.legend(); plt.grid(True); plt.tight_layout()
+    if args.plot:
+        import matplotlib.pyplot as plt
+        plt.show()
+    return 0
+
+# ---- verify ----------------------------------------------------------------------
+def _verify(argv, prog):
+    ap = argparse.ArgumentParser(prog=prog, description="read SOFA files with sofar and run its convention checks")
+    ap.add_argument("--in_dir",  default="out_sofa", help="dir containing *.sofa")
+    ap.add_argument("--pattern", default="*.sofa",   help="glob pattern inside in_dir")
+    ap.add_argument("--quiet",   action="store_true")
+    args = ap.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.in_dir, args.pattern)))
+    if not paths:
+        print(f"[WARN] no .sofa files in: {args.in_dir}/{args.pattern}")
+        return 0
+    import sofar as sf
+    ok = 0
+    for p in paths:
+        try:
+            sf.read_sofa(p, verify=True, verbose=False)
+            ok += 1
+            if not args.quiet: print(f"[OK] {os.path.basename(p)}")
+        except Exception as e:
+            print(f"[FAIL] {os.path.basename(p)} | {e}")
+    print(f"Done. {ok}/{len(paths)} files verified.")
+    return 0 if ok == len(paths) else 1
+
+def _expand(patterns):
+    out = []
+    for p in patterns:
+        out.extend(sorted(glob.glob(p)) if glob.has_magic(p) else [p])
+    return out
+
+# name -> (help, runner(argv, prog))
+COMMANDS = {
+    "convert": ("single intermediate .mat -> SOFA",          _delegate("mat2sofa_sofar_single")),
+    "batch":   ("batch intermediate .mat -> SOFA",           _delegate("mat2sofa_sofar_batch")),
+    "inspect": ("print IR stats of SOFA files (opt. plot)",  _inspect),
+    "export":  ("batch SOFA -> WAV/FLAC",                    _delegate("export_audio")),
+    "verify":  ("check SOFA files against their convention", _verify),
+    "serve":   ("local on-demand SOFA/IR HTTP service",      _delegate("sofa_server")),
+    "synth":   ("shoebox image-source SRIRs -> SOFA",        _delegate("synth_ism")),
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    ap = argparse.ArgumentParser(
+        prog="air_cli.py",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="AIR -> SOFA pipeline tools\n\ncommands:\n" +
+                    "\n".join(f"  {k:<8} {h}" for k, (h, _) in COMMANDS.items()),
+        epilog="run `air_cli.py <command> --help` for command options")
+    ap.add_argument("command", choices=list(COMMANDS), metavar="command")
+    ap.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    ns = ap.parse_args(argv)
+
+    _, run = COMMANDS[ns.command]
+    return run(ns.args, f"air_cli.py {ns.command}")
+
+if __name__ == "__main__":
+    sys.exit(main() or 0)
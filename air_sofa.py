@@ -0,0 +1,180 @@
+# air_sofa.py
+# In-memory AIR (M=1,R=2) -> SOFA (SingleRoomSRIR) conversion shared by the scripts and the service
+import os, tempfile
+import numpy as np
+from datetime import datetime
+
+# ---- helpers ---------------------------------------------------------------
+def as_scalar(x): return float(np.squeeze(x))
+
+def wrap_angle_pm180(x):
+    """map degrees to [-180, 180)"""
+    return ((float(x) + 180.0) % 360.0) - 180.0
+
+_ROOM_RIRNO_TO_DIST = {
+    1:  [0.5, 1.0, 1.5],             # booth
+    2:  [1.0, 2.0, 3.0],             # office
+    3:  [1.45, 1.7, 1.9, 2.25, 2.8], # meeting
+    4:  [2.25, 4.0, 5.56, 7.1, 8.68, 10.2],  # lecture
+    5:  [1.0, 2.0, 3.0],             # stairway
+    11: [1.0, 2.0, 3.0, 5.0, 15.0, 20.0],    # aula_carolina
+}
+# Receiver (R=2) — ±0.09 m (仮) on the interaural axis, relative to the listener at the origin.
+# The listener looks along +x, so left = +y (row order matches ReceiverDescriptions)
+RECEIVER_XYZ = np.array([[0.0,  0.09, 0.0],
+                         [0.0, -0.09, 0.0]])   # (R,3) left, right
+
+_ROOM_NAMES = {
+    1:"booth",2:"office",3:"meeting",4:"lecture",5:"stairway",
+    6:"stairway1",7:"stairway2",8:"corridor",9:"bathroom",10:"lecture1",11:"aula_carolina"
+}
+def fmt_g(x):
+    try: return f"{float(x):g}"
+    except: return str(x)
+
+def rirno_to_distance(room_idx, rir_no):
+    if room_idx not in _ROOM_RIRNO_TO_DIST:
+        raise ValueError(f"room={room_idx} is not in distance table")
+    table = _ROOM_RIRNO_TO_DIST[room_idx]
+    if not (1 <= rir_no <= len(table)):
+        raise ValueError(f"rir_no={rir_no} out of range for room={room_idx} (1..{len(table)})")
+    return float(table[rir_no-1])
+
+def rirtype_label(rt):
+    rt = int(round(float(rt)))
+    return "binaural" if rt==1 else ("phone" if rt==2 else f"type{rt}")
+
+def room_label(room):
+    return _ROOM_NAMES.get(room, f"room{room}")
+
+def sofa_name(room, dist, az_sofa, rir_type, head):
+    """output file name used for out_sofa/ (same scheme as the batch script)"""
+    return f"AIR_room{room}_{room_label(room)}_{fmt_g(dist)}m_az{fmt_g(az_sofa)}_{rirtype_label(rir_type)}{'_head' if head==1 else ''}.sofa"
+
+def intermediate_name(rir_type, room, head, rir_no, azimuth, R=2):
+    """intermediate .mat name written by build_submats.m"""
+    return f"AIR_rirtype{rir_type}_room{room}_head{head}_rirno{rir_no}_az{fmt_g(azimuth)}_R{R}.mat"
+
+# ---- .mat I/O ---------------------------------------------------------------
+def load_intermediate(mat_path):
+    """read an intermediate .mat -> (IR, meta) where meta holds fs/room/rir_no/azimuth/head/rir_type"""
+    from scipy.io import loadmat
+    mat = loadmat(mat_path)
+    meta = dict(
+        fs       = as_scalar(mat["fs"]),
+        room     = int(round(as_scalar(mat["room"]))),
+        rir_no   = int(round(as_scalar(mat["rir_no"]))),
+        azimuth  = as_scalar(mat["azimuth"]),    # AIR: 0=left, 90=front, 180=right
+        head     = int(round(as_scalar(mat["head"]))),
+        rir_type = int(round(as_scalar(mat["rir_type"]))),
+    )
+    return mat["IR"], meta
+
+# ---- core ------------------------------------------------------------------
+def build_sofa(IR, fs, room, rir_no, azimuth, head, rir_type,
+               distance=None, az_sofa=None, el_sofa=0.0, room_type="reverberant", room_corners=None,
+               title=None, comment=None):
+    """
+    Build a SingleRoomSRIR object from in-memory data.
+
+    IR is (M=1,R=2,N). `azimuth` follows AIR (0=left, 90=front) and is mapped to SOFA
+    unless `az_sofa` is given; `distance` defaults to the rir_no table lookup.
+    Measured data is labelled GLOBAL_RoomType="reverberant" (sofar's SingleRoomSRIR default is
+    "shoebox", which is reserved for synthetic data); `room_type`/`title`/`comment` override the
+    GLOBAL defaults and `room_corners` = (A, B) sets RoomCornerA/B (listener-relative, metre).
+    Raises ValueError for shapes/metadata that cannot be converted.
+    """
+    import sofar as sf
+
+    IR = np.asarray(IR)
+    if IR.ndim != 3:
+        raise ValueError(f"IR has ndim={IR.ndim}, expected 3 (M,R,N)")
+    M,R,N = IR.shape
+    if (M,R) != (1,2):
+        raise ValueError(f"(M,R)=({M},{R}) expected (1,2)")
+
+    room, rir_no = int(room), int(rir_no)
+    head, rir_type = int(round(float(head))), int(round(float(rir_type)))
+    dist = rirno_to_distance(room, rir_no) if distance is None else float(distance)
+    if az_sofa is None:
+        az_sofa = wrap_angle_pm180(90.0 - float(azimuth))  # AIR→SOFA
+
+    # build SRIR
+    sofa = sf.Sofa("SingleRoomSRIR", version="1.0")
+
+    # Data.*
+    sofa.Data_IR = IR
+    sofa.Data_SamplingRate = float(fs)
+    sofa.Data_SamplingRate_Units = "hertz"
+    sofa.Data_Delay = np.zeros((M, R))
+
+    # Listener (M=1)
+    sofa.ListenerPosition = np.array([[0.0, 0.0, 0.0]])   # (M,3)
+    sofa.ListenerPosition_Type  = "cartesian"
+    sofa.ListenerPosition_Units = "metre"
+    sofa.ListenerView = np.array([[1.0, 0.0, 0.0]])
+    sofa.ListenerUp   = np.array([[0.0, 0.0, 1.0]])
+    sofa.ListenerView_Type  = "cartesian"
+    sofa.ListenerView_Units = "metre"
+
+    # Receiver (R=2) — ±0.09 m (仮)
+    sofa.ReceiverPosition = RECEIVER_XYZ[:, :, np.newaxis]  # (R,3,M)
+    sofa.ReceiverPosition_Type  = "cartesian"
+    sofa.ReceiverPosition_Units = "metre"
+    rv = np.tile(np.array([[1.0, 0.0, 0.0]]), (R,1))
+    ru = np.tile(np.array([[0.0, 0.0, 1.0]]), (R,1))
+    sofa.ReceiverView = rv[:, :, np.newaxis]
+    sofa.ReceiverUp   = ru[:, :, np.newaxis]
+    sofa.ReceiverDescriptions = np.array(["left", "right"])
+
+    # Source (M=1)
+    sofa.SourcePosition_Type  = "spherical"
+    sofa.SourcePosition_Units = "degree, degree, metre"
+    sofa.SourcePosition = np.array([[az_sofa, float(el_sofa), dist]])  # [az, el, dist]
+    sofa.SourceView = np.array([[1.0, 0.0, 0.0]])
+    sofa.SourceUp   = np.array([[0.0, 0.0, 1.0]])
+    sofa.SourceView_Type  = "cartesian"
+    sofa.SourceView_Units = "metre"
+
+    # Emitter (point, optional)
+    sofa.EmitterPosition = np.zeros((1,3,M))
+    sofa.EmitterPosition_Type  = "cartesian"
+    sofa.EmitterPosition_Units = "metre"
+
+    # GLOBAL meta
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    title = title or f"AIR room={room} ({room_label(room)}), {fmt_g(dist)} m, az={fmt_g(az_sofa)}°, {rirtype_label(rir_type)}{' +head' if head==1 else ''} (SRIR)"
+    sofa.GLOBAL_Title = title
+    sofa.GLOBAL_AuthorContact = "hello"
+    sofa.GLOBAL_Organization  = "hello"
+    sofa.GLOBAL_License       = "Research use; RIRs from AIR DB"
+    sofa.GLOBAL_Comment       = comment or "Converted from AIR v1.4 (Aachen IR DB)"
+    sofa.GLOBAL_DatabaseName  = "Aachen Impulse Response (AIR)"
+    sofa.GLOBAL_RoomType      = room_type
+    if room_type == "reverberant":   # required by the SOFA rules for this RoomType
+        sofa.GLOBAL_RoomDescription = f"AIR room {room} ({room_label(room)}), measured"
+    if room_corners is not None and hasattr(sofa, "RoomCornerA"):  # optional in SingleRoomSRIR
+        sofa.RoomCornerA = np.asarray(room_corners[0], dtype=float).reshape(1, 3)
+        sofa.RoomCornerB = np.asarray(room_corners[1], dtype=float).reshape(1, 3)
+        if hasattr(sofa, "RoomCorners_Type"):
+            sofa.RoomCorners_Type  = "cartesian"
+            sofa.RoomCorners_Units = "metre"
+    sofa.GLOBAL_DateCreated   = now
+    sofa.GLOBAL_DateModified  = now
+    return sofa
+
+def sofa_to_bytes(sofa):
+    """serialise a Sofa object to netCDF bytes (sofar only writes to paths, so go via a temp file)"""
+    import sofar as sf
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tmp.sofa")
+        sf.write_sofa(path, sofa)
+        with open(path, "rb") as f:
+            return f.read()
+
+def convert_arrays(IR, fs, room, rir_no, azimuth, head, rir_type, as_bytes=False, **kw):
+    """in-memory entry point: returns (name, Sofa) or (name, bytes) when as_bytes=True"""
+    sofa = build_sofa(IR, fs, room, rir_no, azimuth, head, rir_type, **kw)
+    az_sofa, dist = sofa.SourcePosition[0, 0], sofa.SourcePosition[0, 2]
+    name = sofa_name(int(room), dist, az_sofa, rir_type, int(round(float(head))))
+    return name, (sofa_to_bytes(sofa) if as_bytes else sofa)
@@ -0,0 +1,76 @@
+# bench_startup.py
+# Startup-time benchmark / regression guard for air_cli.py
+#   python bench_startup.py [--repeat 5] [--budget_ms 150] [--top 10]
+# Runs cheap invocations under `python -X importtime`, prints the slowest imports and exits non-zero
+# if a heavy dependency is imported at startup or the median import time exceeds the budget.
+import os, re, sys, argparse, statistics, subprocess, time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CLI  = os.path.join(HERE, "air_cli.py")
+
+# invocations that must stay cheap (help output and "nothing to do" runs)
+CASES = [
+    ["--help"],
+    ["convert", "--help"],
+    ["batch",   "--help"],
+    ["batch",   "--in_dir", os.path.join(HERE, "__no_such_dir__")],
+    ["inspect", "--help"],
+    ["export",  "--help"],
+    ["export",  "--in_dir", os.path.join(HERE, "__no_such_dir__")],
+    ["verify",  "--in_dir", os.path.join(HERE, "__no_such_dir__")],
+    ["serve",   "--help"],
+    ["synth",   "--help"],
+]
+HEAVY = ("numpy", "scipy", "sofar", "netCDF4", "matplotlib", "soundfile")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def run_once(args):
+    """-> (wall_ms, [(module, self_us, cumulative_us, depth)])"""
+    t0 = time.perf_counter()
+    p = subprocess.run([sys.executable, "-X", "importtime", CLI, *args],
+                       cwd=HERE, capture_output=True, text=True)
+    wall = (time.perf_counter() - t0) * 1e3
+    rows = []
+    for line in p.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            self_us, cum_us, indent, mod = m.groups()
+            rows.append((mod, int(self_us), int(cum_us), (len(indent) - 1) // 2))
+    return wall, rows
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat",    type=int,   default=5,     help="runs per case (median is reported)")
+    ap.add_argument("--budget_ms", type=float, default=150.0, help="max median import time per case [ms]")
+    ap.add_argument("--top",       type=int,   default=8,     help="slowest top-level imports to list")
+    args = ap.parse_args()
+
+    failed = False
+    for case in CASES:
+        walls, imps, last = [], [], []
+        for _ in range(args.repeat):
+            wall, rows = run_once(case)
+            walls.append(wall)
+            imps.append(sum(us for _, us, _, _ in rows) / 1e3)   # sum of self times = total import time
+            last = rows
+        wall_ms, imp_ms = statistics.median(walls), statistics.median(imps)
+
+        heavy = sorted({mod.split(".")[0] for mod, _, _, _ in last if mod.split(".")[0] in HEAVY})
+        over = imp_ms > args.budget_ms
+        status = "FAIL" if (heavy or over) else "ok"
+        failed |= status == "FAIL"
+
+        print(f"[{status}] air_cli.py {' '.join(os.path.basename(a) for a in case)}")
+        print(f"    wall {wall_ms:7.1f} ms | imports {imp_ms:7.1f} ms (budget {args.budget_ms:g}) | {len(last)} modules")
+        if heavy:
+            print(f"    heavy modules imported at startup: {', '.join(heavy)}")
+        top = sorted((r for r in last if r[3] == 0), key=lambda r: -r[2])[:args.top]
+        for mod, _, cum, _ in top:
+            print(f"      {cum/1e3:7.2f} ms  {mod}")
+
+    print("Startup benchmark " + ("FAILED" if failed else "passed") + ".")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
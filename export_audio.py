@@ -0,0 +1,169 @@
+# export_audio.py
+# Headless batch export of SOFA (Data.IR) -> WAV / FLAC for listening and QA copies
+# (reads the netCDF directly; no plotting libraries are imported; numpy is imported per function
+#  so `--help` and empty runs stay cheap)
+import os, glob, struct, argparse
+
+# ---- reading ---------------------------------------------------------------
+def read_ir(sofa_path):
+    """SOFA -> (IR (M,R,N) float64, fs). Only Data.IR / Data.SamplingRate are touched."""
+    import numpy as np
+    from netCDF4 import Dataset
+    with Dataset(sofa_path, "r") as ds:
+        ir = np.asarray(ds.variables["Data.IR"][:], dtype=np.float64)
+        fs = float(np.squeeze(ds.variables["Data.SamplingRate"][:]))
+    return ir, fs
+
+def file_peak(sofa_path):
+    """-> (peak, None) or (None, error message) so one bad file does not abort the corpus scan"""
+    import numpy as np
+    try:
+        ir, _ = read_ir(sofa_path)
+    except Exception as e:
+        return None, f"[FAIL-load] {sofa_path} | {e}"
+    return (float(np.max(np.abs(ir))) if ir.size else 0.0), None
+
+# ---- processing ------------------------------------------------------------
+def trim_tail(x, fs, trim_db=None, max_ms=None):
+    """x: (N,R). drop the tail below trim_db (rel. peak, all channels) and/or cap to max_ms"""
+    import numpy as np
+    n = x.shape[0]
+    if trim_db is not None and n:
+        env = np.max(np.abs(x), axis=1)
+        thr = env.max() * 10.0 ** (-abs(trim_db) / 20.0)
+        above = np.flatnonzero(env > thr)
+        n = int(above[-1]) + 1 if above.size else n
+    if max_ms is not None:
+        n = min(n, int(round(fs * max_ms / 1000.0)))
+    return x[:max(n, 1)]
+
+def quantize(x, bits):
+    """vectorised float (-1..1) -> int16 / int24 (in int32) / float32, clipped"""
+    import numpy as np
+    if bits == 32:
+        return np.clip(x, -1.0, 1.0).astype("<f4")
+    full = float(2 ** (bits - 1) - 1)
+    q = np.rint(np.clip(x, -1.0, 1.0) * full)
+    return q.astype("<i2") if bits == 16 else q.astype("<i4")
+
+def _pcm_bytes(q, bits):
+    import numpy as np
+    if bits == 24:  # pack little-endian int32 -> 3 bytes/sample
+        return q.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return q.tobytes()
+
+def write_wav(path, q, fs, bits):
+    """minimal RIFF writer (PCM 16/24, IEEE float 32); q: (N,R) from quantize()"""
+    import numpy as np
+    n, ch = q.shape
+    data = _pcm_bytes(np.ascontiguousarray(q), bits)
+    fmt_tag = 3 if bits == 32 else 1
+    block = ch * bits // 8
+    fmt = struct.pack("<HHIIHH", fmt_tag, ch, int(fs), int(fs) * block, block, bits)
+    pad = b"\0" * (len(data) % 2)   # RIFF chunks are word-aligned
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", 4 + (8 + len(fmt)) + (8 + len(data) + len(pad))) + b"WAVE")
+        f.write(b"fmt " + struct.pack("<I", len(fmt)) + fmt)
+        f.write(b"data" + struct.pack("<I", len(data)) + data + pad)
+
+def write_flac(path, q, fs, bits):
+    import soundfile as sfile   # optional: only needed for FLAC
+    if bits == 32:
+        raise ValueError("FLAC supports 16/24 bit only")
+    if bits == 24:  # soundfile reads int32 as full-scale, so move the 24-bit value to the top
+        sfile.write(path, q << 8, int(fs), subtype="PCM_24", format="FLAC")
+    else:
+        sfile.write(path, q, int(fs), subtype="PCM_16", format="FLAC")
+
+# ---- per-file job ------------------------------------------------------------
+def export_one(sofa_path, out_dir, fmt="wav", bits=24, gain=None, headroom_db=1.0,
+               trim_db=None, max_ms=None, overwrite=False):
+    """gain=None -> per-file peak normalisation to -headroom_db; otherwise a fixed linear gain"""
+    import numpy as np
+    stem = os.path.splitext(os.path.basename(sofa_path))[0]
+    try:
+        ir, fs = read_ir(sofa_path)
+    except Exception as e:
+        return f"[FAIL-load] {sofa_path} | {e}"
+    if ir.ndim != 3:
+        return f"[SKIP] {sofa_path} | Data.IR has ndim={ir.ndim}, expected 3 (M,R,N)"
+
+    if gain is None:
+        peak = float(np.max(np.abs(ir))) if ir.size else 0.0
+        gain = 10.0 ** (-headroom_db / 20.0) / peak if peak > 0 else 1.0
+
+    M = ir.shape[0]
+    msgs = []
+    for m in range(M):
+        name = f"{stem}_IR{'' if M == 1 else f'_m{m}'}.{fmt}"
+        out_path = os.path.join(out_dir, name)
+        if (not overwrite) and os.path.exists(out_path):
+            msgs.append(f"[EXISTS] {name}")
+            continue
+        x = trim_tail(ir[m].T * gain, fs, trim_db, max_ms)   # (N,R)
+        q = quantize(x, bits)
+        try:
+            (write_flac if fmt == "flac" else write_wav)(out_path, q, fs, bits)
+            msgs.append(f"[OK] {name} (gain={gain:.3f})")
+        except Exception as e:
+            msgs.append(f"[FAIL-write] {name} | {e}")
+    return "\n".join(msgs)
+
+def main(argv=None, prog=None):
+    ap = argparse.ArgumentParser(prog=prog)
+    ap.add_argument("--in_dir",  default="out_sofa",  help="dir containing *.sofa")
+    ap.add_argument("--out_dir", default="out_audio", help="dir to write audio")
+    ap.add_argument("--pattern", default="*.sofa",    help="glob pattern inside in_dir")
+    ap.add_argument("--format",  default="wav", choices=["wav", "flac"])
+    ap.add_argument("--bits",    type=int, default=24, choices=[16, 24, 32], help="32 = float (WAV only)")
+    ap.add_argument("--gain",    default="corpus", choices=["corpus", "file", "none"],
+                    help="corpus: one gain from the global peak, file: per-file peak, none: unity")
+    ap.add_argument("--headroom_db", type=float, default=1.0, help="peak level below full scale [dB]")
+    ap.add_argument("--gain_db", type=float, default=0.0, help="extra gain on top of --gain [dB]")
+    ap.add_argument("--trim_db", type=float, default=None, help="drop tail below this level rel. peak [dB]")
+    ap.add_argument("--max_ms",  type=float, default=None, help="cap output length [ms]")
+    ap.add_argument("--jobs",    type=int, default=os.cpu_count(), help="worker processes")
+    ap.add_argument("--overwrite", action="store_true")
+    ap.add_argument("--quiet",     action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.format == "flac" and args.bits == 32:
+        ap.error("FLAC supports --bits 16 or 24")
+
+    paths = sorted(glob.glob(os.path.join(args.in_dir, args.pattern)))
+    if not paths:
+        print(f"[WARN] no .sofa files in: {args.in_dir}/{args.pattern}")
+        return 0
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    from concurrent.futures import ProcessPoolExecutor
+    extra = 10.0 ** (args.gain_db / 20.0)
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        if args.gain == "corpus":
+            scans = list(pool.map(file_peak, paths, chunksize=8))
+            failed = [err for _, err in scans if err is not None]
+            for err in failed: print(err)
+            paths = [p for p, (pk, _) in zip(paths, scans) if pk is not None]
+            peak = max((pk for pk, _ in scans if pk is not None), default=0.0)
+            gains = [extra * 10.0 ** (-args.headroom_db / 20.0) / peak if peak > 0 else extra] * len(paths)
+            if not args.quiet: print(f"corpus peak = {peak:.6g}  gain = {gains[0] if gains else extra:.4f}")
+        elif args.gain == "none":
+            gains = [extra] * len(paths)
+        else:
+            gains = [None] * len(paths)
+
+        futs = [pool.submit(export_one, p, args.out_dir, args.format, args.bits, g,
+                            args.headroom_db - args.gain_db, args.trim_db, args.max_ms, args.overwrite)
+                for p, g in zip(paths, gains)]
+        ok = 0
+        for fut in futs:
+            msg = fut.result()
+            ok += "[FAIL" not in msg and "[SKIP" not in msg
+            if not args.quiet: print(msg)
+    total = len(paths) + len(failed)
+    print(f"Done. {ok}/{total} files exported.")
+    return 0 if ok == total else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+# sofa_server.py
+# Local on-demand SOFA / raw IR service backed by out_intermediate/ (no shared out_sofa/ needed)
+#
+#   GET  /list                                            -> JSON list of available conditions
+#   GET  /sofa?room=5&rir_no=1&azimuth=90&head=1[&rir_type=1]          -> SOFA (netCDF) bytes
+#   GET  /ir?room=5&rir_no=1&azimuth=90&head=1[&rir_type=1][&format=npy|raw]
+#                                                         -> IR (M,R,N) as .npy, or float32 LE
+#   POST /convert?room=..&rir_no=..&azimuth=..&head=..&fs=..[&rir_type=1][&distance=..][&az_sofa=..]
+#        body: .npy of IR (M=1,R=2,N)                     -> SOFA bytes (sofar serialises via a temp file)
+import os, io, re, glob, json, argparse, threading
+from collections import OrderedDict
+from urllib.parse import urlparse, parse_qs
+# numpy / scipy / sofar (via air_sofa), the worker pools and http.server are imported where they
+# are used so `--help` stays cheap
+
+_MAT_RE = re.compile(r"AIR_rirtype(\d+)_room(\d+)_head(\d+)_rirno(\d+)_az(-?[\d.]+)_R(\d+)\.mat$")
+
+class LRUCache:
+    """thread-safe LRU bounded by total payload bytes; values are Futures so concurrent misses share one job"""
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._d = OrderedDict()
+        self._size = {}
+        self._lock = threading.Lock()
+
+    def get_or_submit(self, key, pool, fn, *args):
+        with self._lock:
+            fut = self._d.get(key)
+            if fut is not None:
+                self._d.move_to_end(key)
+                return fut
+            fut = pool.submit(fn, *args)
+            self._d[key] = fut
+        fut.add_done_callback(lambda f, k=key: self._account(k, f))
+        return fut
+
+    def _account(self, key, fut):
+        with self._lock:
+            if self._d.get(key) is not fut:
+                return
+            if fut.exception() is not None:   # don't cache failures
+                del self._d[key]
+                return
+            self._size[key] = len(fut.result()[1])
+            total = sum(self._size.values())
+            while total > self.max_bytes and len(self._d) > 1:
+                old, _ = self._d.popitem(last=False)
+                total -= self._size.pop(old, 0)
+
+# ---- SOFA jobs (run in worker processes) ---------------------------------------
+# netCDF4/HDF5 is not thread-safe, so everything that calls sofar.write_sofa runs in a process
+# pool (one job per process at a time); .mat/.npy payloads stay on threads.
+def _sofa_from_mat(mat_path):
+    from air_sofa import load_intermediate, convert_arrays
+    IR, meta = load_intermediate(mat_path)
+    return convert_arrays(IR, **meta, as_bytes=True)
+
+def _sofa_from_array(IR, meta):
+    from air_sofa import convert_arrays
+    return convert_arrays(IR, **meta, as_bytes=True)
+
+class SofaService:
+    def __init__(self, in_dir, workers=4, cache_mb=256):
+        import multiprocessing as mp
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+        self.in_dir = in_dir
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.sofa_pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+        self.cache = LRUCache(int(cache_mb * 1024 * 1024))
+
+    def shutdown(self):
+        self.pool.shutdown()
+        self.sofa_pool.shutdown()
+
+    # ---- lookups -----------------------------------------------------------
+    def list_conditions(self):
+        out = []
+        for p in sorted(glob.glob(os.path.join(self.in_dir, "AIR_*.mat"))):
+            m = _MAT_RE.search(os.path.basename(p))
+            if m:
+                rt, room, head, rir_no, az, _ = m.groups()
+                out.append(dict(rir_type=int(rt), room=int(room), head=int(head),
+                                rir_no=int(rir_no), azimuth=float(az)))
+        return out
+
+    def _mat_path(self, key):
+        from air_sofa import intermediate_name
+        rir_type, room, head, rir_no, az = key
+        path = os.path.join(self.in_dir, intermediate_name(rir_type, room, head, rir_no, az))
+        if not os.path.exists(path):
+            raise FileNotFoundError(os.path.basename(path))
+        return path
+
+    # ---- jobs -------------------------------------------------------------------
+    def _ir_job(self, key, fmt):
+        import numpy as np
+        from air_sofa import load_intermediate
+        IR, meta = load_intermediate(self._mat_path(key))
+        if fmt == "raw":
+            body = np.ascontiguousarray(IR, dtype="<f4").tobytes()
+        else:
+            buf = io.BytesIO(); np.save(buf, IR); body = buf.getvalue()
+        return (IR.shape, meta["fs"]), body
+
+    def get_sofa(self, key):
+        path = self._mat_path(key)
+        return self.cache.get_or_submit(("sofa",) + key, self.sofa_pool, _sofa_from_mat, path).result()
+
+    def get_ir(self, key, fmt="npy"):
+        return self.cache.get_or_submit(("ir", fmt) + key, self.pool, self._ir_job, key, fmt).result()
+
+    def convert_posted(self, IR, meta):
+        return self.sofa_pool.submit(_sofa_from_array, IR, meta).result()
+
+def _query_key(q):
+    def req(name, cast):
+        if name not in q:
+            raise ValueError(f"missing parameter: {name}")
+        return cast(q[name][0])
+    return (int(q.get("rir_type", ["1"])[0]), req("room", int), req("head", int),
+            req("rir_no", int), req("azimuth", float))
+
+def make_handler(service, verbose=True):
+    from http.server import BaseHTTPRequestHandler
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code, body, ctype, headers=None):
+            self.send_response(code)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, code, msg):
+            self._send(code, json.dumps({"error": msg}).encode(), "application/json")
+
+        def _dispatch(self, fn):
+            try:
+                fn()
+            except FileNotFoundError as e:
+                self._error(404, f"not found: {e}")
+            except (ValueError, KeyError) as e:
+                self._error(400, str(e))
+            except Exception as e:
+                self._error(500, f"{type(e).__name__}: {e}")
+
+        def do_GET(self):
+            self._dispatch(self._get)
+
+        def do_POST(self):
+            self._dispatch(self._post)
+
+        def _get(self):
+            url = urlparse(self.path)
+            q = parse_qs(url.query)
+            if url.path == "/list":
+                self._send(200, json.dumps(service.list_conditions()).encode(), "application/json")
+            elif url.path == "/sofa":
+                name, body = service.get_sofa(_query_key(q))
+                self._send(200, body, "application/x-netcdf",
+                           {"Content-Disposition": f'attachment; filename="{name}"'})
+            elif url.path == "/ir":
+                fmt = q.get("format", ["npy"])[0]
+                if fmt not in ("npy", "raw"):
+                    raise ValueError(f"format must be npy or raw, got {fmt}")
+                (shape, fs), body = service.get_ir(_query_key(q), fmt)
+                self._send(200, body, "application/octet-stream",
+                           {"X-IR-Shape": ",".join(map(str, shape)), "X-Sampling-Rate": f"{fs:g}",
+                            "X-IR-Dtype": "float32-le" if fmt == "raw" else "npy"})
+            else:
+                self._error(404, f"unknown path: {url.path}")
+
+        def _post(self):
+            url = urlparse(self.path)
+            if url.path != "/convert":
+                self._error(404, f"unknown path: {url.path}")
+                return
+            q = parse_qs(url.query)
+            rir_type, room, head, rir_no, az = _query_key(q)
+            import numpy as np
+            n = int(self.headers.get("Content-Length", 0))
+            IR = np.load(io.BytesIO(self.rfile.read(n)), allow_pickle=False)
+            if "fs" not in q:
+                raise ValueError("missing parameter: fs")
+            meta = dict(fs=float(q["fs"][0]), room=room, rir_no=rir_no,
+                        azimuth=az, head=head, rir_type=rir_type)
+            for opt in ("distance", "az_sofa"):   # rooms outside the rir_no table need distance=
+                if opt in q:
+                    meta[opt] = float(q[opt][0])
+            name, body = service.convert_posted(IR, meta)
+            self._send(200, body, "application/x-netcdf",
+                       {"Content-Disposition": f'attachment; filename="{name}"'})
+
+        def log_message(self, fmt, *args):
+            if verbose:
+                super().log_message(fmt, *args)
+    return Handler
+
+def main(argv=None, prog=None):
+    ap = argparse.ArgumentParser(prog=prog)
+    ap.add_argument("--in_dir",   default="out_intermediate", help="dir containing intermediate *.mat")
+    ap.add_argument("--host",     default="127.0.0.1")
+    ap.add_argument("--port",     type=int, default=8765)
+    ap.add_argument("--workers",  type=int, default=4,   help="SOFA worker processes (and .mat/IR threads)")
+    ap.add_argument("--cache_mb", type=float, default=256, help="response cache size [MB]")
+    ap.add_argument("--quiet",    action="store_true")
+    args = ap.parse_args(argv)
+
+    from http.server import ThreadingHTTPServer
+    service = SofaService(args.in_dir, workers=args.workers, cache_mb=args.cache_mb)
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(service, verbose=not args.quiet))
+    print(f"Serving {args.in_dir} on http://{args.host}:{args.port}  (workers={args.workers}, cache={args.cache_mb:g} MB)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        service.shutdown()
+
+if __name__ == "__main__":
+    main()
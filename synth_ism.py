@@ -0,0 +1,269 @@
+# synth_ism.py
+# Shoebox image-source synthesizer: binaural-pair SRIRs (R=2, same ±0.09 m layout as the AIR SOFA)
+# for arbitrary source positions, vectorised over all image sources x all positions in one pass
+# (positions outside the room are skipped with a warning).
+# Output goes through air_sofa.build_sofa with GLOBAL_RoomType = "shoebox" (or one .npz for bulk use).
+# (numpy is imported per function so `air_cli.py synth --help` stays cheap)
+import os, math, argparse, itertools, warnings
+
+C_SOUND = 343.0   # m/s
+
+# ---- geometry --------------------------------------------------------------
+def sph_to_cart(az_deg, el_deg, dist):
+    """SOFA spherical (az from +x toward +y, el up, metre) -> (P,3) cartesian"""
+    import numpy as np
+    az, el = np.deg2rad(az_deg), np.deg2rad(el_deg)
+    d = np.asarray(dist, dtype=float)
+    return np.stack([d*np.cos(el)*np.cos(az), d*np.cos(el)*np.sin(az), d*np.sin(el)], axis=-1)
+
+def wall_betas(dims, beta=None, rt60=None):
+    """reflection coefficients (6,) = [x0,x1,y0,y1,z0,z1] from beta (scalar or 6) or Sabine RT60"""
+    import numpy as np
+    if rt60 is not None:
+        Lx, Ly, Lz = dims
+        V, S = Lx*Ly*Lz, 2.0*(Lx*Ly + Lx*Lz + Ly*Lz)
+        alpha = 0.161 * V / (S * float(rt60))
+        if not (0.0 < alpha <= 1.0):
+            raise ValueError(f"rt60={rt60} s is not reachable in a {dims} m room (alpha={alpha:.3f})")
+        return np.full(6, np.sqrt(1.0 - alpha))
+    b = np.broadcast_to(np.asarray(0.9 if beta is None else beta, dtype=float), (6,)).copy()
+    if np.any((b < 0) | (b > 1)):
+        raise ValueError(f"beta must be in [0,1], got {b}")
+    return b
+
+def image_orders(dims, max_dist, max_order=None):
+    """
+    per-axis image order needed to cover `max_dist` metres: ceil(max_dist / (2*L_axis)) + 1.
+    -> (orders (3,), truncated axes (3,) bool) where `max_order` (optional cap) cuts below that
+    """
+    import numpy as np
+    need = np.array([math.ceil(max_dist / (2.0 * Lk)) + 1 for Lk in dims], dtype=int)
+    if max_order is None:
+        return need, np.zeros(3, dtype=bool)
+    return np.minimum(need, int(max_order)), need > int(max_order)
+
+def image_table(dims, orders, betas, max_dist=None, src_box=None, rcv_box=None):
+    """
+    Allen & Berkley image set for |n_k| <= orders[k] (an int applies to all three axes).
+    With `max_dist`, images whose nearest possible point (image of `src_box`) is farther than
+    `max_dist` metres from `rcv_box` are dropped (boxes are (lo, hi) pairs, default: whole room).
+    -> sign (I,3), shift (I,3), gain (I,): image = sign*src + shift, amplitude factor = gain
+    """
+    import numpy as np
+    dims = np.asarray(dims, dtype=float)
+    K = np.broadcast_to(np.asarray(orders, dtype=int), (3,))
+    q = np.array([0, 1])
+    nn = np.stack(np.meshgrid(*(np.arange(-k, k + 1) for k in K), indexing="ij"), -1).reshape(-1, 3)
+    qq = np.stack(np.meshgrid(q, q, q, indexing="ij"), -1).reshape(-1, 3)    # (8,3)
+    nn = np.repeat(nn, len(qq), axis=0); qq = np.tile(qq, (len(nn) // len(qq), 1))   # (I,3)
+    sign  = 1.0 - 2.0*qq
+    shift = 2.0*nn*dims
+    if max_dist is not None:
+        s_lo, s_hi = (np.zeros(3), dims) if src_box is None else map(np.asarray, src_box)
+        r_lo, r_hi = (np.zeros(3), dims) if rcv_box is None else map(np.asarray, rcv_box)
+        e1, e2 = sign*s_lo + shift, sign*s_hi + shift                          # image of src box
+        gap = np.maximum(0.0, np.maximum(np.minimum(e1, e2) - r_hi, r_lo - np.maximum(e1, e2)))
+        keep = np.einsum("ij,ij->i", gap, gap) < max_dist**2
+        nn, qq, sign, shift = nn[keep], qq[keep], sign[keep], shift[keep]
+    b = np.asarray(betas, dtype=float).reshape(3, 2)                          # per axis (low, high)
+    gain = np.prod(b[:, 0]**np.abs(nn - qq) * b[:, 1]**np.abs(nn), axis=1)
+    return sign, shift, gain
+
+# ---- core ------------------------------------------------------------------
+def synthesize(dims, listener, src_xyz, fs=48000, n_samples=None, beta=None, rt60=None,
+               max_order=None, c=C_SOUND, chunk_bytes=128 * 2**20):
+    """
+    Shoebox SRIRs for P sources. `listener` is in room coordinates (metre), `src_xyz` (P,3) is
+    listener-relative (SOFA cartesian). Sources outside the room are skipped.
+    Returns (IR (P_in, R=2, N) float32, inside (P,) bool).
+
+    The image order per axis is chosen so that every image arriving within N samples is used
+    (see image_orders); `max_order` is an optional cap and emits a RuntimeWarning when it cuts
+    images off before the end of the IR.
+    All images x receivers are evaluated as one array expression per chunk of positions. A chunk
+    is the smaller of (a) what keeps the (p,I,R) temporaries under `chunk_bytes` and (b) what
+    keeps its p*R*N float64 output slice at ~1 MB: np.bincount scatters the taps at random
+    offsets into that slice, and keeping it cache-sized measured ~15 % faster for 0.5 s IRs.
+    Delays use linear fractional taps. Cost grows with the number of images that arrive within
+    N samples, i.e. ~ (c*N/fs)^3 / volume.
+    """
+    import numpy as np
+    from air_sofa import RECEIVER_XYZ
+
+    dims = np.asarray(dims, dtype=float)
+    L = np.asarray(listener, dtype=float)
+    src = np.atleast_2d(np.asarray(src_xyz, dtype=float)) + L                # room coords
+    rcv = RECEIVER_XYZ + L                                                     # (R,3)
+    if np.any(rcv <= 0) or np.any(rcv >= dims):
+        raise ValueError(f"receiver position outside the {dims.tolist()} m room")
+    inside = np.all((src > 0) & (src < dims), axis=1)
+    src = src[inside]
+    if not len(src):
+        raise ValueError(f"all source positions are outside the {dims.tolist()} m room")
+
+    betas = wall_betas(dims, beta, rt60)
+    if n_samples is None:   # long enough for 60 dB decay (Sabine from the mean absorption)
+        alpha = 1.0 - np.mean(betas)**2
+        V, S = np.prod(dims), 2.0*(dims[0]*dims[1] + dims[0]*dims[2] + dims[1]*dims[2])
+        n_samples = int(np.ceil(fs * min(0.161*V / (S*max(alpha, 1e-3)), 2.0)))
+    N = int(n_samples)
+    max_dist = (N - 1) / fs * c
+    orders, cut = image_orders(dims, max_dist, max_order)
+    if cut.any():
+        warnings.warn(f"max_order={max_order} truncates the image set on axis "
+                      f"{','.join('xyz'[k] for k in range(3) if cut[k])}: the IR tail "
+                      f"({N / fs * 1e3:.0f} ms) needs orders {image_orders(dims, max_dist)[0].tolist()}",
+                      RuntimeWarning, stacklevel=2)
+    sign, shift, gain = image_table(dims, orders, betas, max_dist=max_dist,
+                                    src_box=(src.min(0), src.max(0)), rcv_box=(rcv.min(0), rcv.max(0)))
+
+    # float32 from here on; x/z are shared by both receivers (the pair only differs in y)
+    f32 = np.float32
+    sign, shift = sign.astype(f32), shift.astype(f32)
+    g = (gain / (4.0 * np.pi)).astype(f32)[None, :]                           # (1,I)
+    P, I, R = len(src), len(gain), len(rcv)
+    out = np.zeros(P * R * N, dtype=np.float64)
+    step = max(1, min(int(chunk_bytes // (I * R * 4 * 8)),                   # temporaries
+                      int(2**20 // (R * N * 8))))                              # keep the scatter target in cache
+    k = f32(fs / c)
+    for p0 in range(0, P, step):
+        s = src[p0:p0 + step].astype(f32)                                     # (p,3)
+        p = len(s)
+        X = sign[None, :, 0] * s[:, None, 0] + shift[None, :, 0] - f32(rcv[0, 0])
+        Y = sign[None, :, 1] * s[:, None, 1] + shift[None, :, 1]              # (p,I) image y
+        Z = sign[None, :, 2] * s[:, None, 2] + shift[None, :, 2] - f32(rcv[0, 2])
+        xz2 = X*X + Z*Z
+        row = (np.arange(p, dtype=np.int64) * (R * N))[:, None]               # (p,1)
+        idx, w0, w1 = [], [], []
+        for r in range(R):
+            dy = Y - f32(rcv[r, 1])
+            d = np.sqrt(dy*dy + xz2)
+            np.maximum(d, f32(1e-3), out=d)
+            t = d * k
+            a = g / d
+            a *= t < N - 1                                                     # pruning is per box, not per point
+            n0 = np.minimum(t, f32(N - 2)).astype(np.int32)                    # t >= 0: trunc = floor
+            f = t - n0
+            idx.append(row + (r * N) + n0)                                     # (p,I) int64
+            w1.append(a * f); w0.append(a - w1[-1])
+        size = p * R * N
+        i0 = np.concatenate([i.ravel() for i in idx])
+        seg = out[p0 * R * N:p0 * R * N + size]
+        seg += np.bincount(np.concatenate([i0, i0 + 1]),
+                           weights=np.concatenate([w.ravel() for w in w0 + w1]), minlength=size)
+    return out.reshape(P, R, N).astype(np.float32), inside
+
+# ---- output ----------------------------------------------------------------
+def write_sofas(IR, fs, pos_sph, out_dir, room, dims, listener, overwrite=False, verbose=True):
+    """one SingleRoomSRIR per position via air_sofa.build_sofa (GLOBAL_RoomType='shoebox')"""
+    import numpy as np
+    import sofar as sf
+    from air_sofa import build_sofa, room_label, fmt_g
+
+    os.makedirs(out_dir, exist_ok=True)
+    L = np.asarray(listener, dtype=float)
+    corners = (-L, np.asarray(dims, dtype=float) - L)     # listener-relative
+    ok = 0
+    for ir, (az, el, dist) in zip(IR, pos_sph):
+        out_name = f"ISM_room{room}_{room_label(room)}_{fmt_g(dist)}m_az{fmt_g(az)}_el{fmt_g(el)}_binaural.sofa"
+        out_path = os.path.join(out_dir, out_name)
+        if (not overwrite) and os.path.exists(out_path):
+            if verbose: print(f"[EXISTS] {out_name}")
+            ok += 1
+            continue
+        sofa = build_sofa(ir[np.newaxis], fs, room, 0, None, 0, 1,
+                          distance=dist, az_sofa=az, el_sofa=el,
+                          room_type="shoebox", room_corners=corners,
+                          title=f"ISM room={room} ({room_label(room)}) {fmt_g(dims[0])}x{fmt_g(dims[1])}x{fmt_g(dims[2])} m, "
+                                f"{fmt_g(dist)} m, az={fmt_g(az)}°, el={fmt_g(el)}° (synthetic SRIR)",
+                          comment="Synthetic shoebox image-source SRIR (synth_ism.py), receivers ±0.09 m as in the AIR SOFA set")
+        try:
+            sf.write_sofa(out_path, sofa)
+            ok += 1
+            if verbose: print(f"[OK] {out_name}")
+        except Exception as e:
+            if verbose: print(f"[FAIL-write] {out_name} | {e}")
+    return ok
+
+def _floats(text):
+    """argparse type: '0:180:15' (inclusive range) or '1,2,3' -> list of floats"""
+    try:
+        if ":" in text:
+            a, b, st = (float(v) for v in text.split(":"))
+            if st == 0:
+                raise ValueError("step must be non-zero")
+            vals = [a + i*st for i in range(max(0, math.floor((b - a) / st + 0.5) + 1))]
+        else:
+            vals = [float(v) for v in text.split(",")]
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"{text!r}: expected 'start:stop:step' or 'a,b,c' ({e})")
+    if not vals:
+        raise argparse.ArgumentTypeError(f"{text!r}: empty range")
+    return vals
+
+def main(argv=None, prog=None):
+    ap = argparse.ArgumentParser(prog=prog, description="shoebox image-source SRIRs -> SOFA (RoomType=shoebox)")
+    ap.add_argument("--dims",     type=float, nargs=3, required=True, metavar=("LX", "LY", "LZ"), help="room size [m]")
+    ap.add_argument("--listener", type=float, nargs=3, required=True, metavar=("X", "Y", "Z"), help="listener in room coords [m]")
+    ap.add_argument("--az",   type=_floats, default="-90:90:15", help="SOFA azimuths [deg]: 'start:stop:step' or 'a,b,c'")
+    ap.add_argument("--el",   type=_floats, default="0",         help="elevations [deg]")
+    ap.add_argument("--dist", type=_floats, default="1,2,3",     help="distances [m]")
+    ap.add_argument("--room", type=int, default=0, help="AIR room index used for naming (e.g. 6..10)")
+    ap.add_argument("--fs",   type=float, default=48000)
+    ap.add_argument("--length_ms", type=float, default=None, help="IR length (default: from RT60)")
+    ap.add_argument("--beta",  type=float, nargs="+", default=None, help="reflection coef. (1 or 6 values x0 x1 y0 y1 z0 z1)")
+    ap.add_argument("--rt60",  type=float, default=None, help="target RT60 [s] (Sabine; overrides --beta)")
+    ap.add_argument("--max_order", type=int, default=None,
+                    help="optional image order cap per axis (default: whatever the IR length needs; warns when it truncates)")
+    ap.add_argument("--out_dir", default="out_synth", help="dir to write output")
+    ap.add_argument("--format",  default="sofa", choices=["sofa", "npz"], help="npz: one file with all IRs + positions")
+    ap.add_argument("--overwrite", action="store_true")
+    ap.add_argument("--quiet",     action="store_true")
+    args = ap.parse_args(argv)
+    if args.beta is not None and len(args.beta) not in (1, 6):
+        ap.error("--beta takes 1 or 6 values")
+
+    npz_path = os.path.join(args.out_dir, f"ISM_room{args.room}.npz")
+    if args.format == "npz" and (not args.overwrite) and os.path.exists(npz_path):
+        print(f"[EXISTS] {npz_path} (use --overwrite)")
+        return 0
+
+    import time
+    import numpy as np
+
+    grid = list(itertools.product(args.az, args.el, args.dist))
+    pos_sph = np.array(grid, dtype=float)                                       # (P,3) az,el,dist
+    xyz = sph_to_cart(pos_sph[:, 0], pos_sph[:, 1], pos_sph[:, 2])
+    n_samples = None if args.length_ms is None else int(round(args.fs * args.length_ms / 1000.0))
+
+    t0 = time.perf_counter()
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", RuntimeWarning)
+            IR, inside = synthesize(args.dims, args.listener, xyz, fs=args.fs, n_samples=n_samples,
+                                    beta=args.beta, rt60=args.rt60, max_order=args.max_order)
+    except ValueError as e:
+        ap.error(str(e))
+    dt = time.perf_counter() - t0
+    for w in caught:
+        print(f"[WARN] {w.message}")
+    if not inside.all():
+        print(f"[WARN] skipped {int((~inside).sum())}/{len(inside)} positions outside the room:")
+        for az, el, dist in pos_sph[~inside]:
+            if not args.quiet: print(f"  az={az:g} el={el:g} dist={dist:g} m")
+    pos_sph = pos_sph[inside]
+    print(f"Synthesized {len(IR)} positions, IR (P,R,N) = {IR.shape} in {dt:.3f} s ({len(IR)/max(dt,1e-9):.0f} pos/s)")
+
+    if args.format == "npz":
+        os.makedirs(args.out_dir, exist_ok=True)
+        np.savez(npz_path, IR=IR, fs=args.fs, SourcePosition=pos_sph, dims=np.asarray(args.dims),
+                 listener=np.asarray(args.listener))
+        print(f"Wrote: {npz_path}")
+        return 0
+    ok = write_sofas(IR, args.fs, pos_sph, args.out_dir, args.room, args.dims, args.listener,
+                     overwrite=args.overwrite, verbose=not args.quiet)
+    print(f"Done. {ok}/{len(IR)} files written ({int((~inside).sum())} positions skipped).")
+    return 0 if ok == len(IR) else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())